@@ -0,0 +1,113 @@
+"""ローカルディスク（SQLite）によるAPIレスポンスのキャッシュ"""
+
+import contextlib
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+from config import Config
+
+
+# キャッシュDBのファイル名（Config.CACHE_DIR 配下に作成）
+CACHE_DB_NAME = "cache.sqlite"
+
+
+def make_key(*parts: str) -> str:
+    """キャッシュキーを生成する（各要素を連結したBLAKE2bハッシュ）。"""
+    return hashlib.blake2b("\0".join(parts).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def get(namespace: str, key: str):
+    """キャッシュから値を取得する。
+
+    Args:
+        namespace: 用途ごとの名前空間（例: "analysis"）。
+        key: キャッシュキー。
+
+    Returns:
+        キャッシュされた値。存在しない・期限切れ・キャッシュ無効の場合は None。
+    """
+    if not Config.CACHE_ENABLED:
+        return None
+
+    try:
+        with _connect() as conn:
+            row = conn.execute(
+                "SELECT value, expires_at FROM cache WHERE namespace = ? AND key = ?",
+                (namespace, key),
+            ).fetchone()
+    except (sqlite3.Error, OSError) as e:
+        print(f"⚠️ キャッシュの読み込みに失敗: {e}")
+        return None
+
+    if row is None:
+        return None
+
+    value, expires_at = row
+    if expires_at is not None and expires_at < time.time():
+        return None
+
+    try:
+        return json.loads(value)
+    except ValueError as e:
+        # 壊れた値はキャッシュなしとして扱う（次回の put で上書きされる）
+        print(f"⚠️ キャッシュの値を読み込めません: {e}")
+        return None
+
+
+def put(namespace: str, key: str, value, ttl: float | None = None) -> None:
+    """値をキャッシュに保存する（JSONとしてシリアライズ）。
+
+    Args:
+        namespace: 用途ごとの名前空間。
+        key: キャッシュキー。
+        value: 保存する値（JSONシリアライズ可能なもの）。
+        ttl: 有効期間（秒）。Noneの場合は無期限。
+    """
+    if not Config.CACHE_ENABLED:
+        return
+
+    expires_at = time.time() + ttl if ttl is not None else None
+    try:
+        with _connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                (namespace, key, json.dumps(value, ensure_ascii=False), expires_at),
+            )
+    except (sqlite3.Error, OSError) as e:
+        print(f"⚠️ キャッシュの保存に失敗: {e}")
+
+
+def clear(namespace: str | None = None) -> None:
+    """キャッシュを削除する。
+
+    Args:
+        namespace: 削除する名前空間。Noneの場合はすべて削除。
+    """
+    try:
+        with _connect() as conn:
+            if namespace is None:
+                conn.execute("DELETE FROM cache")
+            else:
+                conn.execute("DELETE FROM cache WHERE namespace = ?", (namespace,))
+    except (sqlite3.Error, OSError) as e:
+        print(f"⚠️ キャッシュの削除に失敗: {e}")
+
+
+@contextlib.contextmanager
+def _connect():
+    """キャッシュDBに接続する（SQLiteの接続はスレッド間で共有できないため呼び出しごとに開閉）。"""
+    os.makedirs(Config.CACHE_DIR, exist_ok=True)
+    conn = sqlite3.connect(os.path.join(Config.CACHE_DIR, CACHE_DB_NAME), timeout=10)
+    try:
+        with conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, expires_at REAL, "
+                "PRIMARY KEY (namespace, key))"
+            )
+            yield conn
+    finally:
+        conn.close()
@@ -28,6 +28,20 @@ class Config:
     GOOGLE_CLIENT_SECRETS_FILE: str = os.getenv("GOOGLE_CLIENT_SECRETS_FILE", "client_secrets.json").strip()
     GOOGLE_DRIVE_FOLDER_ID: str = os.getenv("GOOGLE_DRIVE_FOLDER_ID", "").strip()
 
+    # APIレスポンスのローカルキャッシュ（同じ動画の再分析を避ける）
+    CACHE_DIR: str = os.path.expanduser(os.getenv("CACHE_DIR", "~/.cache/youtubeagent"))
+    CACHE_ENABLED: bool = os.getenv("CACHE_ENABLED", "true").strip().lower() not in ("0", "false", "no")
+
+    # validate で検証対象とするキー（呼び出しごとに辞書を組み立てない）
+    REQUIRED_KEYS: tuple[str, ...] = (
+        "YOUTUBE_API_KEY",
+        "GEMINI_API_KEY",
+        "LINE_CHANNEL_ACCESS_TOKEN",
+        "LINE_USER_ID",
+        "NOTION_TOKEN",
+        "NOTION_DATABASE_ID",
+    )
+
     @classmethod
     def validate(cls, required_keys: list[str] | None = None) -> bool:
         """必要なAPIキーがすべて設定されているか検証する。
@@ -38,22 +52,13 @@ class Config:
         Returns:
             すべてのキーが設定されていれば True。
         """
-        all_keys = {
-            "YOUTUBE_API_KEY": cls.YOUTUBE_API_KEY,
-            "GEMINI_API_KEY": cls.GEMINI_API_KEY,
-            "LINE_CHANNEL_ACCESS_TOKEN": cls.LINE_CHANNEL_ACCESS_TOKEN,
-            "LINE_USER_ID": cls.LINE_USER_ID,
-            "NOTION_TOKEN": cls.NOTION_TOKEN,
-            "NOTION_DATABASE_ID": cls.NOTION_DATABASE_ID,
-        }
-
         keys_to_check = (
-            {k: all_keys[k] for k in required_keys if k in all_keys}
+            [k for k in required_keys if k in cls.REQUIRED_KEYS]
             if required_keys
-            else all_keys
+            else cls.REQUIRED_KEYS
         )
 
-        missing = [k for k, v in keys_to_check.items() if not v]
+        missing = [k for k in keys_to_check if not getattr(cls, k)]
 
         if missing:
             print("❌ 以下のAPIキーが .env に設定されていません:", file=sys.stderr)
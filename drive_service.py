@@ -1,7 +1,11 @@
 """Google Driveへの画像アップロードサービス"""
 
+import atexit
 import os
+import threading
+from datetime import datetime, timedelta, timezone
 
+from google.auth.exceptions import RefreshError
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
@@ -13,17 +17,51 @@ from config import Config
 
 SCOPES = ["https://www.googleapis.com/auth/drive"]
 
+TOKEN_PATH = os.path.join(os.path.dirname(__file__), "token.json")
+
+# 有効期限のこの時間前にバックグラウンドでトークンを更新する
+TOKEN_REFRESH_MARGIN = timedelta(minutes=5)
+
+# これ未満のファイルはresumableセッションを張らず1リクエストでアップロードする
+SIMPLE_UPLOAD_MAX_BYTES = 5 * 1024 * 1024
+
+# build() はディスカバリー文書の解析を伴い重いため、プロセス内で使い回す
+_drive_service = None
+_drive_service_lock = threading.Lock()
+_refresh_stop: threading.Event | None = None
+
 
 def get_drive_service():
-    """OAuth 2.0で認証し、Drive APIのサービスインスタンスを返す。"""
+    """OAuth 2.0で認証し、Drive APIのサービスインスタンスを返す。
+
+    初回呼び出し時に生成したインスタンスをキャッシュして再利用する。
+    """
+    global _drive_service
+    if _drive_service is None:
+        with _drive_service_lock:
+            if _drive_service is None:
+                _drive_service = _build_drive_service()
+    return _drive_service
+
+
+def _reset_drive_service() -> None:
+    """キャッシュ済みのサービスインスタンスを破棄する（トークン失効時用）。"""
+    global _drive_service
+    with _drive_service_lock:
+        _drive_service = None
+    stop_token_refresher()
+
+
+def _build_drive_service():
+    """token.json から認証情報を読み込み、Drive APIのサービスインスタンスを生成する。"""
     creds = None
-    token_path = os.path.join(os.path.dirname(__file__), "token.json")
-    
+
     # 既存のトークンがあれば読み込む
-    if os.path.exists(token_path):
-        creds = Credentials.from_authorized_user_file(token_path, SCOPES)
+    if os.path.exists(TOKEN_PATH):
+        creds = Credentials.from_authorized_user_file(TOKEN_PATH, SCOPES)
         
     # 有効なクレデンシャルがない場合はログインプロセスを実行
+    # （有効期限切れ時のインライン更新は、バックグラウンド更新が間に合わなかった場合の保険）
     if not creds or not creds.valid:
         if creds and creds.expired and creds.refresh_token:
             creds.refresh(Request())
@@ -43,10 +81,63 @@ def get_drive_service():
             creds = flow.run_local_server(port=0)
             
         # 次回以降のためにトークンを保存
-        with open(token_path, "w") as token:
-            token.write(creds.to_json())
-            
-    return build("drive", "v3", credentials=creds)
+        _save_token(creds)
+
+    _start_token_refresher(creds)
+    # 同梱のディスカバリ文書を使い、ネットワーク取得とファイルキャッシュの探索を省く
+    return build("drive", "v3", credentials=creds, static_discovery=True, cache_discovery=False)
+
+
+def _save_token(creds: Credentials) -> None:
+    """token.json を一時ファイル経由で書き換える（書き込み途中の破損を防ぐ）。"""
+    tmp_path = f"{TOKEN_PATH}.tmp"
+    with open(tmp_path, "w") as token:
+        token.write(creds.to_json())
+    os.replace(tmp_path, TOKEN_PATH)
+
+
+def _start_token_refresher(creds: Credentials) -> None:
+    """トークンを期限前に更新するデーモンスレッドを起動する。"""
+    global _refresh_stop
+    if not creds.refresh_token:
+        return
+
+    stop_token_refresher()
+    _refresh_stop = threading.Event()
+    threading.Thread(
+        target=_refresh_loop,
+        args=(creds, _refresh_stop),
+        name="drive-token-refresher",
+        daemon=True,
+    ).start()
+
+
+def stop_token_refresher() -> None:
+    """バックグラウンドのトークン更新を停止する。"""
+    if _refresh_stop is not None:
+        _refresh_stop.set()
+
+
+def _refresh_loop(creds: Credentials, stop: threading.Event) -> None:
+    """有効期限の TOKEN_REFRESH_MARGIN 前になるたびにトークンを更新する。"""
+    while creds.expiry:
+        # google-auth の expiry はタイムゾーンなしのUTC
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        delay = (creds.expiry - TOKEN_REFRESH_MARGIN - now).total_seconds()
+        if stop.wait(max(delay, 0)):
+            return
+
+        try:
+            with _drive_service_lock:
+                creds.refresh(Request())
+                _save_token(creds)
+        except Exception as e:
+            # 失敗時はリクエスト時のインライン更新に任せる
+            print(f"⚠️ [Drive] バックグラウンドでのトークン更新に失敗: {type(e).__name__}: {e}")
+            return
+
+
+atexit.register(stop_token_refresher)
 
 
 def upload_image_to_drive(file_path: str, filename: str = "") -> str:
@@ -62,16 +153,26 @@ def upload_image_to_drive(file_path: str, filename: str = "") -> str:
     if not filename:
         filename = os.path.basename(file_path)
 
-    service = get_drive_service()
+    try:
+        return _upload(get_drive_service(), file_path, filename)
+    except RefreshError as e:
+        # キャッシュ中の認証情報が失効していた場合は作り直して1回だけ再試行
+        print(f"⚠️ [Drive] トークンの更新に失敗したため再認証します: {e}")
+        _reset_drive_service()
+        return _upload(get_drive_service(), file_path, filename)
+
 
+def _upload(service, file_path: str, filename: str) -> str:
+    """アップロードと公開共有設定を行い、画像URLを返す。"""
     # ファイルメタデータ
     file_metadata = {
         "name": filename,
         "parents": [Config.GOOGLE_DRIVE_FOLDER_ID],
     }
 
-    # アップロード
-    media = MediaFileUpload(file_path, mimetype="image/png", resumable=True)
+    # アップロード（小さい画像はマルチパート1回で送信し、resumableの往復を省く）
+    resumable = os.path.getsize(file_path) >= SIMPLE_UPLOAD_MAX_BYTES
+    media = MediaFileUpload(file_path, mimetype="image/png", resumable=resumable)
     uploaded = (
         service.files()
         .create(body=file_metadata, media_body=media, fields="id", supportsAllDrives=True)
@@ -80,9 +181,13 @@ def upload_image_to_drive(file_path: str, filename: str = "") -> str:
     file_id = uploaded["id"]
 
     # 公開共有設定（誰でもリンクで閲覧可能）
+    # files.create のIDが必要なためバッチ化はできないが、キャッシュ済みサービスの
+    # Keep-Alive接続に乗せ、レスポンスもIDのみに絞る
     service.permissions().create(
         fileId=file_id,
         body={"type": "anyone", "role": "reader"},
+        fields="id",
+        supportsAllDrives=True,
     ).execute()
 
     # 直接アクセス可能な画像URL
@@ -1,16 +1,29 @@
 """Gemini APIによる動画分析・要約・ダイジェスト生成サービス"""
 
+import functools
+import json
+from datetime import datetime, timezone, timedelta
+
 from google import genai
 from google.genai import types
 
+import cache_service
 from config import Config
+from rate_limiter import GEMINI_LIMITER
 
 
-# 分類＋要約プロンプト（YouTube URLをGeminiに直接渡す）
-CLASSIFY_AND_SUMMARIZE_PROMPT = """あなたはYouTube動画の内容を正確かつ簡潔に要約する専門家です。
-このYouTube動画を視聴して3つの作業を行ってください。
+# 日本時間
+JST = timezone(timedelta(hours=9))
 
-━━━━━━━━━━━━━━━━━━
+# 使用するモデル
+GEMINI_MODEL = "gemini-3-flash-preview"
+
+# 1回のリクエストでまとめて分析する動画数の上限
+# （動画はトークン消費が大きく、コンテキスト長を超えないよう小さめにする）
+MAX_VIDEOS_PER_REQUEST = 3
+
+# 分類・キーワード抽出・要約の作業指示（単体分析・一括分析で共通）
+_ANALYSIS_TASKS = """━━━━━━━━━━━━━━━━━━
 ■ 作業1: コンテンツ分類
 ━━━━━━━━━━━━━━━━━━
 この動画の内容を以下の3つのいずれかに分類してください。
@@ -49,19 +62,54 @@ CLASSIFY_AND_SUMMARIZE_PROMPT = """あなたはYouTube動画の内容を正確
 
 【アクションアイテム/結論】
 （視聴者が取るべきアクションや動画の結論を簡潔に）
+"""
+
+# 分類＋要約プロンプト（YouTube URLをGeminiに直接渡す）
+CLASSIFY_AND_SUMMARIZE_PROMPT = """あなたはYouTube動画の内容を正確かつ簡潔に要約する専門家です。
+このYouTube動画を視聴して3つの作業を行ってください。
 
+""" + _ANALYSIS_TASKS
+
+# 複数動画の一括分析プロンプト（動画パートの後に続けて渡す）
+BATCH_ANALYZE_PROMPT = """あなたはYouTube動画の内容を正確かつ簡潔に要約する専門家です。
+添付した{count}本のYouTube動画をそれぞれ視聴し、動画ごとに3つの作業を行ってください。
+動画には添付順に 1 から番号を振り、その番号を video_index として出力してください。
+
+""" + _ANALYSIS_TASKS + """
 ━━━━━━━━━━━━━━━━━━
-■ 出力形式（厳守）
+■ 出力形式
 ━━━━━━━━━━━━━━━━━━
-必ず以下の順番で出力してください。
-
-1行目: 分類ラベル（例: CATEGORY: NEWS）
-2行目: キーワード（カンマ区切り。例: KEYWORDS: Gemini, SVG, AI活用）
-3行目以降: 要約
+動画ごとに1要素のJSON配列で出力してください。
 """
 
+# 分析結果のレスポンススキーマ（構造化出力でJSONとして受け取る）
+_ANALYSIS_PROPERTIES = {
+    "category": types.Schema(type=types.Type.STRING, enum=["NEWS", "HOWTO", "GENERAL"]),
+    "keywords": types.Schema(type=types.Type.ARRAY, items=types.Schema(type=types.Type.STRING)),
+    "summary": types.Schema(type=types.Type.STRING),
+}
+
+_ANALYSIS_SCHEMA = types.Schema(
+    type=types.Type.OBJECT,
+    properties=_ANALYSIS_PROPERTIES,
+    required=["category", "keywords", "summary"],
+    property_ordering=["category", "keywords", "summary"],
+)
+
+# 一括分析のレスポンススキーマ（動画ごとの分析結果の配列）
+_BATCH_ANALYSIS_SCHEMA = types.Schema(
+    type=types.Type.ARRAY,
+    items=types.Schema(
+        type=types.Type.OBJECT,
+        properties={"video_index": types.Schema(type=types.Type.INTEGER), **_ANALYSIS_PROPERTIES},
+        required=["video_index", "category", "keywords", "summary"],
+        property_ordering=["video_index", "category", "keywords", "summary"],
+    ),
+)
+
 
 # ダイジェスト（日刊まとめ）プロンプトテンプレート
+# 各動画の要約はテンプレートに埋め込まず、別パートとして続けて渡す
 DIGEST_PROMPT = """あなたは最新のAI・テクノロジー情報をわかりやすくまとめる専門家です。
 以下の複数の動画要約を読み、「本日の最新トピック」として
 友人や知人に共有するための、読みやすいダイジェストを作成してください。
@@ -88,11 +136,38 @@ DIGEST_PROMPT = """あなたは最新のAI・テクノロジー情報をわか
 
 ---
 以下が各動画の要約です:
-
-{summaries}
 """
 
 
+# 分析結果キャッシュの名前空間（動画の内容は変わらないため無期限）
+ANALYSIS_CACHE_NAMESPACE = "analysis"
+
+# 出力スキーマの内容（キャッシュキーに含め、スキーマ変更時に古い結果を使わないようにする）
+_ANALYSIS_SCHEMA_JSON = _ANALYSIS_SCHEMA.model_dump_json(exclude_none=True)
+
+
+@functools.lru_cache(maxsize=1)
+def _get_client() -> genai.Client:
+    """Geminiクライアントを生成し、プロセス内で使い回す（HTTP接続もKeep-Aliveで再利用）。"""
+    return genai.Client(api_key=Config.GEMINI_API_KEY)
+
+
+def _generate_analysis(video_urls: list[str], prompt: str, schema: types.Schema):
+    """動画パートと分析指示をGeminiに送り、構造化出力のレスポンスを返す。"""
+    GEMINI_LIMITER.take()
+    return _get_client().models.generate_content(
+        model=GEMINI_MODEL,
+        contents=[
+            *(types.Part.from_uri(file_uri=url, mime_type="video/*") for url in video_urls),
+            prompt,
+        ],
+        config=types.GenerateContentConfig(
+            response_mime_type="application/json",
+            response_schema=schema,
+        ),
+    )
+
+
 def analyze_video(video_url: str) -> dict:
     """YouTube動画をGeminiで直接分析する（分類+要約）。
 
@@ -103,65 +178,90 @@ def analyze_video(video_url: str) -> dict:
         video_url: YouTube動画のURL。
 
     Returns:
-        {"category": "NEWS"|"HOWTO"|"GENERAL", "summary": str}
+        {"category": "NEWS"|"HOWTO"|"GENERAL", "keywords": list[str], "summary": str}
     """
-    client = genai.Client(api_key=Config.GEMINI_API_KEY)
+    cache_key = _analysis_cache_key(video_url)
+    cached = cache_service.get(ANALYSIS_CACHE_NAMESPACE, cache_key)
+    if cached is not None:
+        print("♻️ キャッシュ済みの分析結果を使用します")
+        return cached
 
-    response = client.models.generate_content(
-        model="gemini-3-flash-preview",
-        contents=[
-            types.Part.from_uri(file_uri=video_url, mime_type="video/*"),
-            CLASSIFY_AND_SUMMARIZE_PROMPT,
-        ],
-    )
+    response = _generate_analysis([video_url], CLASSIFY_AND_SUMMARIZE_PROMPT, _ANALYSIS_SCHEMA)
 
-    return _parse_classification_response(response.text)
+    result = _normalize_analysis(json.loads(response.text))
+    cache_service.put(ANALYSIS_CACHE_NAMESPACE, cache_key, result)
+    return result
 
 
-def _parse_classification_response(text: str) -> dict:
-    """Geminiの分類+キーワード+要約レスポンスをパースする。
+def analyze_videos(video_urls: list[str]) -> list[dict]:
+    """複数のYouTube動画を1回のGeminiリクエストでまとめて分析する。
 
-    1行目: CATEGORY: NEWS
-    2行目: KEYWORDS: Gemini, SVG, AI活用
-    3行目以降: 要約テキスト
+    動画ごとにリクエストする場合に比べ、往復回数を動画数分から1回に減らせます。
+    分析済み（キャッシュ済み）の動画はリクエストに含めません。
 
     Args:
-        text: Geminiのレスポンステキスト。
+        video_urls: YouTube動画のURLリスト（最大 MAX_VIDEOS_PER_REQUEST 件）。
 
     Returns:
-        {"category": str, "keywords": list[str], "summary": str}
+        video_urls と同じ順序の分析結果リスト。各要素は analyze_video と同じ形式。
+
+    Raises:
+        ValueError: 動画数が上限を超える場合、またはレスポンスに欠けている動画がある場合
+            （レスポンスに含まれていた動画の結果はキャッシュ済み）。
+    """
+    if len(video_urls) > MAX_VIDEOS_PER_REQUEST:
+        raise ValueError(f"一度に分析できる動画は {MAX_VIDEOS_PER_REQUEST} 件までです: {len(video_urls)} 件")
+
+    cache_keys = [_analysis_cache_key(url) for url in video_urls]
+    results = [cache_service.get(ANALYSIS_CACHE_NAMESPACE, key) for key in cache_keys]
+    pending = [i for i, result in enumerate(results) if result is None]
+    if len(pending) < len(video_urls):
+        print(f"♻️ キャッシュ済みの分析結果を使用します: {len(video_urls) - len(pending)} 件")
+    if not pending:
+        return results
+
+    pending_urls = [video_urls[i] for i in pending]
+    response = _generate_analysis(
+        pending_urls,
+        BATCH_ANALYZE_PROMPT.format(count=len(pending_urls)),
+        _BATCH_ANALYSIS_SCHEMA,
+    )
+
+    items = {item.get("video_index"): item for item in json.loads(response.text)}
+
+    # 返ってきた分は先にキャッシュしておく（欠けた動画で失敗しても、
+    # 呼び出し側の動画ごとの分析でキャッシュから再利用され、二重に課金されない）
+    missing = []
+    for index, i in enumerate(pending, 1):
+        if index not in items:
+            missing.append(index)
+            continue
+        results[i] = _normalize_analysis(items[index])
+        cache_service.put(ANALYSIS_CACHE_NAMESPACE, cache_keys[i], results[i])
+
+    if missing:
+        raise ValueError(f"一括分析のレスポンスに含まれない動画があります: {missing}")
+
+    return results
+
+
+def _analysis_cache_key(video_url: str) -> str:
+    """分析結果のキャッシュキー。
+
+    モデル・出力スキーマ・作業指示のいずれかが変わったら別キーになるよう、それらも含める。
     """
-    lines = text.strip().split("\n")
-
-    category = "NEWS"  # デフォルト
-    keywords = []
-    summary_start = 0
-
-    for i, line in enumerate(lines):
-        stripped = line.strip().upper()
-        if stripped.startswith("CATEGORY:"):
-            cat_value = line.strip().split(":", 1)[1].strip().upper()
-            if "HOWTO" in cat_value:
-                category = "HOWTO"
-            elif "GENERAL" in cat_value:
-                category = "GENERAL"
-            else:
-                category = "NEWS"
-            summary_start = i + 1
-        elif stripped.startswith("KEYWORDS:"):
-            kw_value = line.strip().split(":", 1)[1].strip()
-            keywords = [k.strip() for k in kw_value.split(",") if k.strip()]
-            summary_start = i + 1
-        else:
-            # 分類・キーワード行以外が出てきたら要約の開始
-            if summary_start <= i and (category != "NEWS" or keywords):
-                break
-
-    summary = "\n".join(lines[summary_start:]).strip()
-    if not summary:
-        summary = text  # パース失敗時は全文を要約とする
-
-    return {"category": category, "keywords": keywords, "summary": summary}
+    return cache_service.make_key(GEMINI_MODEL, _ANALYSIS_SCHEMA_JSON, _ANALYSIS_TASKS, video_url)
+
+
+def _normalize_analysis(item: dict) -> dict:
+    """JSONの分析結果を {"category", "keywords", "summary"} の形に整える。"""
+    category = str(item.get("category", "")).strip().upper()
+    if category not in ("NEWS", "HOWTO", "GENERAL"):
+        category = "NEWS"  # デフォルト
+
+    keywords = [str(k).strip() for k in item.get("keywords") or [] if str(k).strip()]
+
+    return {"category": category, "keywords": keywords, "summary": str(item.get("summary", "")).strip()}
 
 
 def generate_daily_digest(summaries: list[dict]) -> str:
@@ -173,24 +273,22 @@ def generate_daily_digest(summaries: list[dict]) -> str:
     Returns:
         日刊ダイジェストテキスト。
     """
-    from datetime import datetime, timezone, timedelta
-
-    client = genai.Client(api_key=Config.GEMINI_API_KEY)
+    client = _get_client()
 
     # 今日の日付を取得（日本時間）
-    jst = timezone(timedelta(hours=9))
-    today = datetime.now(jst).strftime("%m/%d")
+    today = datetime.now(JST).strftime("%m/%d")
 
     # 要約を連結
-    combined = ""
-    for i, s in enumerate(summaries, 1):
-        combined += f"--- 動画{i}: {s['title']} ---\n{s['summary']}\n\n"
-
-    prompt = DIGEST_PROMPT.format(summaries=combined, today=today)
+    combined = "".join(
+        f"--- 動画{i}: {s['title']} ---\n{s['summary']}\n\n"
+        for i, s in enumerate(summaries, 1)
+    )
 
+    # 要約本文をプロンプト文字列へ連結してコピーしないよう、パートを分けて渡す
+    GEMINI_LIMITER.take()
     response = client.models.generate_content(
-        model="gemini-3-flash-preview",
-        contents=prompt,
+        model=GEMINI_MODEL,
+        contents=[DIGEST_PROMPT.format(today=today), combined],
     )
 
     return response.text
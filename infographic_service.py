@@ -1,5 +1,6 @@
 """Gemini Imagenによるインフォグラフィック画像生成サービス"""
 
+import functools
 import os
 import tempfile
 from datetime import datetime, timezone, timedelta
@@ -10,6 +11,7 @@ from PIL import Image
 from io import BytesIO
 
 from config import Config
+from rate_limiter import GEMINI_LIMITER
 
 
 # 画像生成プロンプト
@@ -34,6 +36,29 @@ INFOGRAPHIC_PROMPT = """以下のAI・テクノロジーニュースダイジェ
 """
 
 
+# 日本時間
+JST = timezone(timedelta(hours=9))
+
+# スタイル参考画像
+REFERENCE_IMAGE_PATH = os.path.join(os.path.dirname(__file__), "assets", "reference_style.png")
+
+
+@functools.lru_cache(maxsize=1)
+def _get_client() -> genai.Client:
+    """画像生成用のGeminiクライアント（初回のみ生成）。"""
+    return genai.Client(api_key=Config.GEMINI_API_KEY)
+
+
+@functools.lru_cache(maxsize=1)
+def _load_reference_image() -> bytes | None:
+    """参考画像を初回のみ読み込んで保持する。存在しない場合はNone。"""
+    try:
+        with open(REFERENCE_IMAGE_PATH, "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
 def generate_infographic(digest_text: str) -> str | None:
     """ダイジェスト内容からインフォグラフィック画像を生成する。
 
@@ -45,28 +70,24 @@ def generate_infographic(digest_text: str) -> str | None:
     Returns:
         生成された画像のローカルファイルパス。生成失敗時はNone。
     """
-    client = genai.Client(api_key=Config.GEMINI_API_KEY)
+    client = _get_client()
 
     # 今日の日付（日本時間）
-    jst = timezone(timedelta(hours=9))
-    today = datetime.now(jst).strftime("%m/%d")
+    today = datetime.now(JST).strftime("%m/%d")
 
     prompt = INFOGRAPHIC_PROMPT.format(today=today, digest_text=digest_text)
 
-    # 参考画像を読み込む
-    reference_path = os.path.join(os.path.dirname(__file__), "assets", "reference_style.png")
+    # 参考画像を添付
     parts = []
-
-    if os.path.exists(reference_path):
-        print("🎨 参考画像を読み込み中...")
-        with open(reference_path, "rb") as f:
-            ref_data = f.read()
+    ref_data = _load_reference_image()
+    if ref_data:
         parts.append(types.Part.from_bytes(data=ref_data, mime_type="image/png"))
 
     parts.append(prompt)
 
     try:
         print("🖼️ インフォグラフィックを生成中...")
+        GEMINI_LIMITER.take()
         response = client.models.generate_content(
             model="gemini-2.0-flash-exp-image-generation",
             contents=parts,
@@ -80,11 +101,16 @@ def generate_infographic(digest_text: str) -> str | None:
             if part.inline_data and part.inline_data.mime_type.startswith("image/"):
                 # 一時ファイルに保存
                 tmp_dir = tempfile.gettempdir()
-                timestamp = datetime.now(jst).strftime("%Y%m%d_%H%M%S")
+                timestamp = datetime.now(JST).strftime("%Y%m%d_%H%M%S")
                 output_path = os.path.join(tmp_dir, f"infographic_{timestamp}.png")
 
-                image = Image.open(BytesIO(part.inline_data.data))
-                image.save(output_path, "PNG")
+                if part.inline_data.mime_type == "image/png":
+                    # PNGならデコード・再エンコードせずそのまま書き出す
+                    with open(output_path, "wb") as f:
+                        f.write(part.inline_data.data)
+                else:
+                    image = Image.open(BytesIO(part.inline_data.data))
+                    image.save(output_path, "PNG")
 
                 print(f"✅ インフォグラフィック生成完了: {output_path}")
                 return output_path
@@ -1,10 +1,44 @@
 """LINE Messaging APIによる通知サービス"""
 
+import uuid
+
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from config import Config
 
 
+# api.line.me への接続をKeep-Aliveで使い回すセッション
+# （認証ヘッダーはトークンの変更に追従できるよう、リクエストごとに付与する）
+_session = requests.Session()
+# Push APIはX-Line-Retry-Keyで冪等になるため、POSTもリトライ対象にする
+# （先の試行が成功していた場合、再送は409になるため send_digest で成功扱いにする）
+_session.mount("https://", HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=8,
+    max_retries=Retry(
+        total=2,
+        backoff_factor=0.3,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=None,
+        raise_on_status=False,
+    ),
+))
+
+
+def warm_up() -> None:
+    """api.line.me への接続を事前に確立しておく。
+
+    ダイジェスト生成中などに呼んでおくと、送信時のTCP/TLSハンドシェイクを省ける。
+    失敗しても送信時に改めて接続するだけなので、エラーは無視する。
+    """
+    try:
+        _session.head("https://api.line.me/", timeout=5)
+    except requests.RequestException:
+        pass
+
+
 def send_digest(digest_text: str, image_url: str = "") -> bool:
     """日刊ダイジェストをLINEに送信する。
 
@@ -38,17 +72,22 @@ def send_digest(digest_text: str, image_url: str = "") -> bool:
     headers = {
         "Content-Type": "application/json",
         "Authorization": f"Bearer {Config.LINE_CHANNEL_ACCESS_TOKEN}",
+        "X-Line-Retry-Key": str(uuid.uuid4()),
     }
     payload = {
         "to": Config.LINE_USER_ID,
         "messages": messages,
     }
 
-    response = requests.post(url, json=payload, headers=headers, timeout=30)
+    response = _session.post(url, json=payload, headers=headers, timeout=30)
 
     if response.status_code == 200:
         print("✅ LINEダイジェストを送信しました")
         return True
+    elif response.status_code == 409:
+        # 同じリトライキーのリクエストが受理済み（リトライ前の送信が成功していた）
+        print("✅ LINEダイジェストを送信しました（再送リクエストは受理済み）")
+        return True
     else:
         print(f"❌ LINEダイジェストの送信に失敗しました: {response.status_code}")
         print(f"   レスポンス: {response.text}")
@@ -1,20 +1,81 @@
 """YouTube Intelligence & Automation Agent — メインオーケストレーター"""
 
 import argparse
+import asyncio
+import contextlib
+import contextvars
+import io
 import sys
-import time
+import threading
 import traceback
 
 from config import Config
 from youtube_service import extract_video_id, get_video_info, get_latest_videos
-from gemini_service import analyze_video, generate_daily_digest
+from gemini_service import (
+    MAX_VIDEOS_PER_REQUEST,
+    analyze_video,
+    analyze_videos,
+    generate_daily_digest,
+)
 from infographic_service import generate_infographic
 from drive_service import upload_image_to_drive
-from line_service import send_digest
+from line_service import send_digest, warm_up as warm_up_line
 from notion_service import create_page, check_video_exists
 
 
-def process_video(video_url: str, dry_run: bool = False) -> dict | None:
+# チャンネルモードで同時に処理する動画数の上限（各APIのレート制限対策）
+MAX_CONCURRENT_VIDEOS = 3
+
+# 処理中の動画の出力バッファ（asyncio.to_thread はコンテキストを引き継ぐため、
+# スレッド内で実行される各サービスの print も同じバッファに集まる）
+_output_buffer: contextvars.ContextVar[io.StringIO | None] = contextvars.ContextVar(
+    "output_buffer", default=None
+)
+
+
+class _ContextStdout:
+    """現在のコンテキストに出力バッファがあればそこへ、なければ元の標準出力へ書き込む。"""
+
+    def __init__(self, stream):
+        self._stream = stream
+
+    def write(self, text: str) -> int:
+        buffer = _output_buffer.get()
+        return (buffer if buffer is not None else self._stream).write(text)
+
+    def flush(self) -> None:
+        if _output_buffer.get() is None:
+            self._stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+@contextlib.contextmanager
+def _buffered_output():
+    """ブロック内の出力（サービス内の print を含む）をバッファし、終了時に1回で書き出す。
+
+    並行処理中の動画同士で出力行が混在しないようにする。
+    """
+    if not isinstance(sys.stdout, _ContextStdout):
+        sys.stdout = _ContextStdout(sys.stdout)
+
+    buffer = io.StringIO()
+    token = _output_buffer.set(buffer)
+    try:
+        yield
+    finally:
+        _output_buffer.reset(token)
+        sys.stdout.write(buffer.getvalue())
+        sys.stdout.flush()
+
+
+async def process_video(
+    video_url: str,
+    dry_run: bool = False,
+    analysis: dict | None = None,
+    video_info: dict | None = None,
+) -> dict | None:
     """単一動画の処理パイプライン。
 
     1. 動画情報を取得（YouTube Data API）
@@ -24,6 +85,8 @@ def process_video(video_url: str, dry_run: bool = False) -> dict | None:
     Args:
         video_url: YouTube動画のURLまたは動画ID。
         dry_run: Trueの場合、Notionへの送信をスキップ。
+        analysis: 一括分析済みの結果（analyze_video と同じ形式）。Noneの場合はここで分析する。
+        video_info: 取得済みの動画情報（get_video_info と同じ形式）。Noneの場合はここで取得する。
 
     Returns:
         NEWS系の場合: {"title": str, "summary": str}（ダイジェスト素材）
@@ -42,8 +105,11 @@ def process_video(video_url: str, dry_run: bool = False) -> dict | None:
         return None
 
     # --- Step 2: 動画情報取得（YouTube Data API） ---
+    # 削除済み・非公開の動画に課金対象のGemini分析を走らせないよう、先に存在を確認する
+    full_url = f"https://www.youtube.com/watch?v={video_id}"
     try:
-        video_info = get_video_info(video_id)
+        if video_info is None:
+            video_info = await asyncio.to_thread(get_video_info, video_id)
         print(f"✅ タイトル: {video_info['title']}")
         print(f"   チャンネル: {video_info['channel_title']}")
         print(f"   公開日: {video_info['published_at']}")
@@ -52,10 +118,10 @@ def process_video(video_url: str, dry_run: bool = False) -> dict | None:
         return None
 
     # --- Step 3: Geminiで直接分析（分類+要約） ---
-    full_url = f"https://www.youtube.com/watch?v={video_id}"
-    try:
+    if analysis is None:
         print(f"🔍 Geminiで動画を分析中...")
-        result = analyze_video(full_url)
+    try:
+        result = analysis if analysis is not None else await asyncio.to_thread(analyze_video, full_url)
         category = result["category"]
         keywords = result["keywords"]
         summary = result["summary"]
@@ -75,7 +141,8 @@ def process_video(video_url: str, dry_run: bool = False) -> dict | None:
         print("🔸 [DRY-RUN] Notionページ作成をスキップしました")
     else:
         try:
-            create_page(
+            await asyncio.to_thread(
+                create_page,
                 title=video_info["title"],
                 url=full_url,
                 summary=summary,
@@ -100,9 +167,40 @@ def process_video(video_url: str, dry_run: bool = False) -> dict | None:
         return None
 
 
-def process_channel(channel_id: str, count: int = 5, dry_run: bool = False) -> list[dict]:
+async def process_channels(channel_ids: list[str], count: int = 5, dry_run: bool = False) -> list[dict]:
+    """複数チャンネルを並行して処理し、NEWS系の要約をチャンネル順にまとめて返す。
+
+    同時実行数の上限（MAX_CONCURRENT_VIDEOS）は全チャンネルで共有する。
+    出力はチャンネルごとにバッファし、チャンネルの処理が終わった時点でまとめて書き出す。
+
+    Args:
+        channel_ids: YouTubeチャンネルIDのリスト。
+        count: チャンネルごとに取得する動画数。
+        dry_run: Trueの場合、Notionへの送信をスキップ。
+
+    Returns:
+        NEWS系の動画要約リスト。
+    """
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_VIDEOS)
+
+    async def _run(channel_id: str) -> list[dict]:
+        # 動画ごとのバッファはこのチャンネルのバッファに書き出される
+        with _buffered_output():
+            return await process_channel(channel_id, count=count, dry_run=dry_run, semaphore=semaphore)
+
+    results = await asyncio.gather(*(_run(channel_id) for channel_id in channel_ids))
+    return [news for channel_news in results for news in channel_news]
+
+
+async def process_channel(
+    channel_id: str,
+    count: int = 5,
+    dry_run: bool = False,
+    semaphore: asyncio.Semaphore | None = None,
+) -> list[dict]:
     """チャンネルの最新動画を処理する。
 
+    各動画は最大 MAX_CONCURRENT_VIDEOS 件まで並行して処理する。
     全動画をNotionに保存し、NEWS系の要約リストを返す。
     LINE送信はここでは行わない（全チャンネル処理後に一括送信）。
 
@@ -110,14 +208,22 @@ def process_channel(channel_id: str, count: int = 5, dry_run: bool = False) -> l
         channel_id: YouTubeチャンネルID。
         count: 取得する動画数。
         dry_run: Trueの場合、Notionへの送信をスキップ。
+        semaphore: 同時実行数を制限するセマフォ。複数チャンネルで共有する場合に指定。
 
     Returns:
         NEWS系の動画要約リスト。
     """
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_VIDEOS)
+
+    async def _bounded(func, *args, **kwargs):
+        async with semaphore:
+            return await asyncio.to_thread(func, *args, **kwargs)
+
     print(f"\n📺 チャンネル {channel_id} の最新 {count} 件を取得中...")
 
     try:
-        videos = get_latest_videos(channel_id, max_results=count)
+        videos = await _bounded(get_latest_videos, channel_id, max_results=count)
     except Exception as e:
         print(f"❌ チャンネルの動画取得に失敗: {e}")
         return []
@@ -128,27 +234,66 @@ def process_channel(channel_id: str, count: int = 5, dry_run: bool = False) -> l
 
     print(f"📋 {len(videos)} 件の動画を処理します\n")
 
-    # --- 各動画を処理してNotionに保存、NEWS系の要約を収集 ---
+    urls = [f"https://www.youtube.com/watch?v={video['video_id']}" for video in videos]
+
+    # --- 重複チェック（DRY-RUN時はスキップしない、またはDBの実データに基づく） ---
+    total = len(videos)
+    if not dry_run:
+        exists = await asyncio.gather(*(_bounded(check_video_exists, url) for url in urls))
+        for url, found in zip(urls, exists):
+            if found:
+                print(f"⏭️ 既にNotionに保存済みの動画です。処理をスキップします: {url}")
+        videos = [video for video, found in zip(videos, exists) if not found]
+        urls = [url for url, found in zip(urls, exists) if not found]
+
+    if not urls:
+        print(f"\n📊 [{channel_id}] 結果: NEWS 0 件 / 全 {total} 件")
+        return []
+
+    # --- Geminiで複数動画をまとめて分析（失敗したバッチは動画ごとの分析にフォールバック） ---
+    batches = [urls[i:i + MAX_VIDEOS_PER_REQUEST] for i in range(0, len(urls), MAX_VIDEOS_PER_REQUEST)]
+    print(f"🔍 Geminiで {len(urls)} 件の動画をまとめて分析中...")
+    batch_results = await asyncio.gather(
+        *(_bounded(analyze_videos, batch) for batch in batches),
+        return_exceptions=True,
+    )
+
+    analyses = []
+    for batch, batch_result in zip(batches, batch_results):
+        if isinstance(batch_result, Exception):
+            print(
+                f"⚠️ [{channel_id}] 一括分析に失敗したため動画ごとに分析します: "
+                f"{type(batch_result).__name__}: {batch_result}"
+            )
+            analyses.extend([None] * len(batch))
+        else:
+            analyses.extend(batch_result)
+
+    # --- 各動画を並行処理してNotionに保存、NEWS系の要約を収集 ---
+    # （動画情報は get_latest_videos で取得済みのものを渡し、動画ごとに再取得しない）
+    # 動画ごとの出力は見出しも含めてバッファし、完了時にまとめて書き出す
+    async def _process(i: int, video: dict, url: str, analysis: dict | None) -> dict | None:
+        async with semaphore:
+            with _buffered_output():
+                print(f"\n--- [{channel_id} {i}/{len(urls)}] ---")
+                return await process_video(url, dry_run=dry_run, analysis=analysis, video_info=video)
+
+    results = await asyncio.gather(
+        *(
+            _process(i, video, url, analysis)
+            for i, (video, url, analysis) in enumerate(zip(videos, urls, analyses), 1)
+        ),
+        return_exceptions=True,
+    )
+
     news_results = []
-    for i, video in enumerate(videos, 1):
-        print(f"\n--- [{i}/{len(videos)}] ---")
-        video_url = f"https://www.youtube.com/watch?v={video['video_id']}"
-        
-        # 重複チェック（DRY-RUN時はスキップしない、またはDBの実データに基づく）
-        if not dry_run and check_video_exists(video_url):
-            print(f"⏭️ 既にNotionに保存済みの動画です。処理をスキップします: {video_url}")
-            continue
-            
-        result = process_video(video_url, dry_run=dry_run)
-        if result:
+    for video, result in zip(videos, results):
+        if isinstance(result, Exception):
+            print(f"❌ 動画の処理に失敗 ({video['video_id']}): {type(result).__name__}: {result}")
+        elif result:
             news_results.append(result)
 
-        # 動画間に3秒待機（API負荷軽減）
-        if i < len(videos):
-            print("⏳ 3秒待機中...")
-            time.sleep(3)
-
-    print(f"\n📊 結果: NEWS {len(news_results)} 件 / 全 {len(videos)} 件")
+    print(f"\n📊 [{channel_id}] 結果: NEWS {len(news_results)} 件 / 全 {total} 件")
     return news_results
 
 
@@ -207,15 +352,12 @@ def main():
 
     try:
         if args.url:
-            result = process_video(args.url, dry_run=args.dry_run)
+            result = asyncio.run(process_video(args.url, dry_run=args.dry_run))
             sys.exit(0 if result is not None else 1)
         elif args.channel:
             # カンマ区切りで複数のチャンネルIDを処理可能にする
             channels = [c.strip() for c in args.channel.split(",") if c.strip()]
-            all_news = []
-            for channel_id in channels:
-                news = process_channel(channel_id, count=args.count, dry_run=args.dry_run)
-                all_news.extend(news)
+            all_news = asyncio.run(process_channels(channels, count=args.count, dry_run=args.dry_run))
 
             # --- 全チャンネル処理後にダイジェスト生成 & LINE送信（1回だけ） ---
             print(f"\n{'═' * 50}")
@@ -225,6 +367,8 @@ def main():
             if all_news and not args.dry_run:
                 print(f"\n📰 全チャンネル統合ダイジェストを生成中（{len(all_news)} 件のNEWS）...")
                 try:
+                    # LINEへの接続確立をダイジェスト生成（数秒）の裏で済ませておく
+                    threading.Thread(target=warm_up_line, daemon=True).start()
                     digest = generate_daily_digest(all_news)
                     print(f"\n{'─' * 40}")
                     print("📰 ダイジェスト:")
@@ -1,8 +1,17 @@
 """Notion APIによるデータベースページ作成サービス"""
 
-from notion_client import Client
+import functools
+
+from notion_client import APIErrorCode, APIResponseError, Client
 
 from config import Config
+from rate_limiter import NOTION_LIMITER
+
+
+@functools.lru_cache(maxsize=1)
+def _client() -> Client:
+    """Notionクライアントを生成し使い回す（内部のhttpx接続プールを全ページで共有）。"""
+    return Client(auth=Config.NOTION_TOKEN)
 
 
 def create_page(
@@ -30,7 +39,7 @@ def create_page(
     print(f"📝 [Notion] DB ID: {Config.NOTION_DATABASE_ID[:8]}...")
 
     try:
-        notion = Client(auth=Config.NOTION_TOKEN)
+        notion = _client()
     except Exception as e:
         print(f"❌ [Notion] クライアント初期化失敗: {type(e).__name__}: {e}")
         raise
@@ -99,35 +108,39 @@ def create_page(
             "multi_select": [{"name": kw[:100]} for kw in keywords[:10]]
         }
 
-    # ページを作成（要約はページ本文のchildren blocksとして追加）
+    # 要約プロパティ（Rich TextプロパティがDBにある場合）も作成時にまとめて設定する
+    properties["要約"] = {
+        "rich_text": [{"text": {"content": chunk}} for chunk in summary_chunks]
+    }
+
+    # ページを作成（要約はページ本文のchildren blocksとしても追加）
+    children = _build_summary_blocks(summary)
     try:
-        page = notion.pages.create(
-            parent={"database_id": Config.NOTION_DATABASE_ID},
-            properties=properties,
-            children=_build_summary_blocks(summary),
-        )
+        try:
+            NOTION_LIMITER.take()
+            page = notion.pages.create(
+                parent={"database_id": Config.NOTION_DATABASE_ID},
+                properties=properties,
+                children=children,
+            )
+        except APIResponseError as e:
+            # DBに「要約」プロパティがない場合のみ、除外して作成し直す
+            if e.code != APIErrorCode.ValidationError or "要約" not in str(e):
+                raise
+            print(f"⚠️ [Notion] 要約プロパティ設定スキップ: {type(e).__name__}: {e}")
+            del properties["要約"]
+            NOTION_LIMITER.take()
+            page = notion.pages.create(
+                parent={"database_id": Config.NOTION_DATABASE_ID},
+                properties=properties,
+                children=children,
+            )
     except Exception as e:
         print(f"❌ [Notion] ページ作成API失敗: {type(e).__name__}: {e}")
         raise
 
     print(f"✅ [Notion] ページ作成成功: {page.get('url', page['id'])}")
 
-    # 要約プロパティも更新（Rich TextプロパティがDBにある場合）
-    try:
-        notion.pages.update(
-            page_id=page["id"],
-            properties={
-                "要約": {
-                    "rich_text": [
-                        {"text": {"content": chunk}} for chunk in summary_chunks
-                    ]
-                },
-            },
-        )
-        print(f"✅ [Notion] 要約プロパティ更新成功")
-    except Exception as e:
-        print(f"⚠️ [Notion] 要約プロパティ更新スキップ: {type(e).__name__}: {e}")
-
     return page
 
 
@@ -143,8 +156,9 @@ def check_video_exists(url: str) -> bool:
         存在すればTrue、存在しなければFalse
     """
     try:
-        notion = Client(auth=Config.NOTION_TOKEN)
+        notion = _client()
         
+        NOTION_LIMITER.take()
         response = notion.databases.query(
             database_id=Config.NOTION_DATABASE_ID,
             filter={
@@ -167,11 +181,10 @@ def check_video_exists(url: str) -> bool:
 
 def _split_rich_text(text: str, max_length: int = 2000) -> list[str]:
     """テキストをNotionのRich Text制限に合わせて分割する。"""
-    chunks = []
-    while text:
-        chunks.append(text[:max_length])
-        text = text[max_length:]
-    return chunks if chunks else [""]
+    # 大半の要約は制限内に収まるため、分割せずにそのまま返す
+    if len(text) <= max_length:
+        return [text]
+    return [text[i:i + max_length] for i in range(0, len(text), max_length)]
 
 
 def _build_summary_blocks(summary: str) -> list[dict]:
@@ -180,55 +193,32 @@ def _build_summary_blocks(summary: str) -> list[dict]:
     行ごとに適切なブロックタイプに変換する。
     """
     blocks = []
-    lines = summary.split("\n")
 
-    for line in lines:
+    for line in summary.split("\n"):
         stripped = line.strip()
         if not stripped:
             continue
 
         # 見出し行（【...】で始まる行）
         if stripped.startswith("【") and "】" in stripped:
-            blocks.append(
-                {
-                    "object": "block",
-                    "type": "heading_2",
-                    "heading_2": {
-                        "rich_text": [{"text": {"content": stripped[:2000]}}]
-                    },
-                }
-            )
+            blocks.append(_text_block("heading_2", stripped))
         # 箇条書き（・で始まる行）
-        elif stripped.startswith("・") or stripped.startswith("- "):
-            content = stripped.lstrip("・- ").strip()
-            blocks.append(
-                {
-                    "object": "block",
-                    "type": "bulleted_list_item",
-                    "bulleted_list_item": {
-                        "rich_text": [{"text": {"content": content[:2000]}}]
-                    },
-                }
-            )
-        # 区切り線
-        elif stripped == "---" or stripped == "─" * len(stripped):
-            blocks.append(
-                {
-                    "object": "block",
-                    "type": "divider",
-                    "divider": {},
-                }
-            )
+        elif stripped.startswith(("・", "- ")):
+            blocks.append(_text_block("bulleted_list_item", stripped.lstrip("・- ").strip()))
+        # 区切り線（"---" または "─" のみの行。比較用の文字列を組み立てずに判定）
+        elif stripped == "---" or not stripped.strip("─"):
+            blocks.append({"object": "block", "type": "divider", "divider": {}})
         # 通常テキスト
         else:
-            blocks.append(
-                {
-                    "object": "block",
-                    "type": "paragraph",
-                    "paragraph": {
-                        "rich_text": [{"text": {"content": stripped[:2000]}}]
-                    },
-                }
-            )
+            blocks.append(_text_block("paragraph", stripped))
 
     return blocks
+
+
+def _text_block(block_type: str, content: str) -> dict:
+    """テキスト1件を持つNotionブロックを作る（Rich Text制限の2000文字で切り詰め）。"""
+    return {
+        "object": "block",
+        "type": block_type,
+        block_type: {"rich_text": [{"text": {"content": content[:2000]}}]},
+    }
@@ -0,0 +1,44 @@
+"""APIごとのリクエストレート制限（トークンバケット）"""
+
+import threading
+import time
+
+
+class TokenBucket:
+    """スレッドセーフなトークンバケット。
+
+    per 秒あたり rate 回までのリクエストを許可し、上限を超える場合のみ待機する。
+    一律に sleep する場合と違い、前の処理に時間がかかっていれば待たずに済む。
+    """
+
+    def __init__(self, rate: int, per: float):
+        self.rate = rate
+        self.per = per
+        self._tokens = float(rate)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def take(self) -> None:
+        """トークンを1つ消費する。不足している場合は補充されるまで待機する。"""
+        with self._lock:
+            now = time.monotonic()
+            elapsed = now - self._updated
+            self._tokens = min(self.rate, self._tokens + elapsed * self.rate / self.per)
+            self._updated = now
+
+            # 先にトークンを予約しておき、待機はロックの外で行う
+            self._tokens -= 1
+            wait = -self._tokens * self.per / self.rate if self._tokens < 0 else 0.0
+
+        if wait > 0:
+            time.sleep(wait)
+
+
+# YouTube Data API
+YOUTUBE_LIMITER = TokenBucket(rate=60, per=60)
+
+# Gemini API（動画分析・ダイジェスト・画像生成で共有）
+GEMINI_LIMITER = TokenBucket(rate=15, per=60)
+
+# Notion API（平均 3リクエスト/秒まで）
+NOTION_LIMITER = TokenBucket(rate=3, per=1)
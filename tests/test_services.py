@@ -1,10 +1,37 @@
 """各サービスモジュールの単体テスト"""
 
+import asyncio
+import io
+import json
+import tempfile
+import time
 import unittest
 from unittest.mock import patch, MagicMock
 
 # テスト対象
-from youtube_service import extract_video_id, _join_transcript
+# youtube_service は googleapiclient の読み込みが重いため、使うテストの実行時まで遅延インポートする
+def extract_video_id(url):
+    from youtube_service import extract_video_id as _extract_video_id
+
+    return _extract_video_id(url)
+
+
+class TempCacheDirMixin:
+    """ローカルキャッシュ（cache_service）をテストごとに空の一時ディレクトリへ向ける
+
+    開発者の .env（CACHE_ENABLED=false 等）に左右されないよう、キャッシュは常に有効にする。
+    """
+
+    def setUp(self):
+        super().setUp()
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        for patcher in (
+            patch("config.Config.CACHE_DIR", cache_dir.name),
+            patch("config.Config.CACHE_ENABLED", True),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
 
 
 class TestExtractVideoId(unittest.TestCase):
@@ -37,6 +64,30 @@ class TestExtractVideoId(unittest.TestCase):
         url = "https://m.youtube.com/watch?v=dQw4w9WgXcQ"
         self.assertEqual(extract_video_id(url), "dQw4w9WgXcQ")
 
+    def test_v_param_not_first(self):
+        url = "https://www.youtube.com/watch?feature=share&v=dQw4w9WgXcQ"
+        self.assertEqual(extract_video_id(url), "dQw4w9WgXcQ")
+
+    def test_short_url_with_params(self):
+        url = "https://youtu.be/dQw4w9WgXcQ?si=abc"
+        self.assertEqual(extract_video_id(url), "dQw4w9WgXcQ")
+
+    def test_v_path_url(self):
+        url = "https://www.youtube.com/v/dQw4w9WgXcQ"
+        self.assertEqual(extract_video_id(url), "dQw4w9WgXcQ")
+
+    def test_e_path_url(self):
+        url = "https://www.youtube.com/e/dQw4w9WgXcQ"
+        self.assertEqual(extract_video_id(url), "dQw4w9WgXcQ")
+
+    def test_live_url(self):
+        url = "https://www.youtube.com/live/dQw4w9WgXcQ?si=abc"
+        self.assertEqual(extract_video_id(url), "dQw4w9WgXcQ")
+
+    def test_similar_param_name(self):
+        with self.assertRaises(ValueError):
+            extract_video_id("https://www.youtube.com/watch?vv=dQw4w9WgXcQ")
+
     def test_invalid_url(self):
         with self.assertRaises(ValueError):
             extract_video_id("https://www.google.com")
@@ -46,76 +97,213 @@ class TestExtractVideoId(unittest.TestCase):
             extract_video_id("")
 
 
-class TestJoinTranscript(unittest.TestCase):
-    """字幕テキスト結合のテスト"""
+class TestGetVideosInfo(TempCacheDirMixin, unittest.TestCase):
+    """動画メタデータ一括取得のテスト"""
+
+    @patch("youtube_service._youtube_client")
+    def test_single_request_for_multiple_ids(self, mock_client):
+        mock_list = mock_client.return_value.videos.return_value.list
+        mock_list.return_value.execute.return_value = {
+            "items": [
+                {
+                    "id": "aaaaaaaaaaa",
+                    "snippet": {
+                        "title": "動画A",
+                        "publishedAt": "2025-01-15T00:00:00Z",
+                        "channelTitle": "チャンネル",
+                        "thumbnails": {
+                            "high": {"url": "https://img/high.jpg"},
+                            "default": {"url": "https://img/default.jpg"},
+                        },
+                    },
+                },
+            ]
+        }
+
+        from youtube_service import get_videos_info
+
+        infos = get_videos_info(["aaaaaaaaaaa", "bbbbbbbbbbb"])
+        mock_list.assert_called_once()
+        self.assertEqual(mock_list.call_args.kwargs["id"], "aaaaaaaaaaa,bbbbbbbbbbb")
+        self.assertEqual(list(infos), ["aaaaaaaaaaa"])
+        self.assertEqual(infos["aaaaaaaaaaa"]["thumbnail_url"], "https://img/high.jpg")
+
+        # 取得済みの動画はキャッシュから返し、見つからなかった動画だけを問い合わせる
+        infos = get_videos_info(["aaaaaaaaaaa", "bbbbbbbbbbb"])
+        self.assertEqual(mock_list.call_count, 2)
+        self.assertEqual(mock_list.call_args.kwargs["id"], "bbbbbbbbbbb")
+        self.assertEqual(infos["aaaaaaaaaaa"]["title"], "動画A")
+
+        from youtube_service import clear_cache
+
+        clear_cache()
+        get_videos_info(["aaaaaaaaaaa"])
+        self.assertEqual(mock_list.call_count, 3)
+
+
+class TestGeminiService(TempCacheDirMixin, unittest.TestCase):
+    """Gemini要約サービスのテスト"""
 
-    def test_dict_entries(self):
-        entries = [
-            {"text": "こんにちは"},
-            {"text": "世界"},
-        ]
-        result = _join_transcript(entries)
-        self.assertEqual(result, "こんにちは 世界")
+    @patch("gemini_service._get_client")
+    def test_analyze_video_structured_output(self, mock_get_client):
+        mock_response = MagicMock()
+        mock_response.text = json.dumps(
+            {"category": "HOWTO", "keywords": ["Gemini", " "], "summary": "【概要】テスト要約"}
+        )
+        mock_get_client.return_value.models.generate_content.return_value = mock_response
 
-    def test_object_entries(self):
-        entry1 = MagicMock()
-        entry1.text = "Hello"
-        entry2 = MagicMock()
-        entry2.text = "World"
-        result = _join_transcript([entry1, entry2])
-        self.assertEqual(result, "Hello World")
+        from gemini_service import analyze_video
 
-    def test_empty_entries(self):
-        result = _join_transcript([])
-        self.assertEqual(result, "")
+        result = analyze_video("https://www.youtube.com/watch?v=dQw4w9WgXcQ")
+        self.assertEqual(result["category"], "HOWTO")
+        self.assertEqual(result["keywords"], ["Gemini"])
+        self.assertEqual(result["summary"], "【概要】テスト要約")
 
+    @patch("gemini_service._get_client")
+    def test_analyze_videos_orders_by_video_index(self, mock_get_client):
+        mock_response = MagicMock()
+        mock_response.text = json.dumps([
+            {"video_index": 2, "category": "HOWTO", "keywords": ["B"], "summary": "要約2"},
+            {"video_index": 1, "category": "NEWS", "keywords": ["A"], "summary": "要約1"},
+        ])
+        mock_get_client.return_value.models.generate_content.return_value = mock_response
+
+        from gemini_service import analyze_videos
+
+        result = analyze_videos([
+            "https://www.youtube.com/watch?v=aaaaaaaaaaa",
+            "https://www.youtube.com/watch?v=bbbbbbbbbbb",
+        ])
+        self.assertEqual([r["summary"] for r in result], ["要約1", "要約2"])
+        self.assertEqual(result[1]["category"], "HOWTO")
+        mock_get_client.return_value.models.generate_content.assert_called_once()
+
+    @patch("gemini_service._get_client")
+    def test_analyze_videos_missing_video(self, mock_get_client):
+        mock_response = MagicMock()
+        mock_response.text = json.dumps([
+            {"video_index": 1, "category": "NEWS", "keywords": [], "summary": "要約1"},
+        ])
+        mock_get_client.return_value.models.generate_content.return_value = mock_response
 
-class TestGeminiService(unittest.TestCase):
-    """Gemini要約サービスのテスト"""
+        from gemini_service import analyze_videos
 
-    @patch("gemini_service.genai")
-    def test_summarize_transcript(self, mock_genai):
-        # モックのセットアップ
-        mock_client = MagicMock()
-        mock_genai.Client.return_value = mock_client
+        with self.assertRaises(ValueError):
+            analyze_videos([
+                "https://www.youtube.com/watch?v=aaaaaaaaaaa",
+                "https://www.youtube.com/watch?v=bbbbbbbbbbb",
+            ])
+
+        # 返ってきた動画の結果はキャッシュ済みで、動画ごとの再分析でGeminiを呼ばない
+        from gemini_service import analyze_video
+
+        result = analyze_video("https://www.youtube.com/watch?v=aaaaaaaaaaa")
+        self.assertEqual(result["summary"], "要約1")
+        mock_get_client.return_value.models.generate_content.assert_called_once()
+
+    @patch("gemini_service._get_client")
+    def test_analyze_videos_skips_cached_videos(self, mock_get_client):
+        mock_response = MagicMock()
+        mock_response.text = json.dumps(
+            {"category": "NEWS", "keywords": ["A"], "summary": "要約1"}
+        )
+        mock_get_client.return_value.models.generate_content.return_value = mock_response
+
+        from gemini_service import analyze_video, analyze_videos
+
+        analyze_video("https://www.youtube.com/watch?v=aaaaaaaaaaa")
+
+        # キャッシュ済みの1件目はリクエストに含めず、2件目だけを分析する
+        mock_response.text = json.dumps([
+            {"video_index": 1, "category": "HOWTO", "keywords": ["B"], "summary": "要約2"},
+        ])
+        result = analyze_videos([
+            "https://www.youtube.com/watch?v=aaaaaaaaaaa",
+            "https://www.youtube.com/watch?v=bbbbbbbbbbb",
+        ])
+        self.assertEqual([r["summary"] for r in result], ["要約1", "要約2"])
+        self.assertEqual(mock_get_client.return_value.models.generate_content.call_count, 2)
+
+        # 全件キャッシュ済みならGeminiを呼ばない
+        analyze_videos([
+            "https://www.youtube.com/watch?v=bbbbbbbbbbb",
+            "https://www.youtube.com/watch?v=aaaaaaaaaaa",
+        ])
+        self.assertEqual(mock_get_client.return_value.models.generate_content.call_count, 2)
+
+    @patch("gemini_service._get_client")
+    def test_analysis_cache_is_keyed_on_model(self, mock_get_client):
         mock_response = MagicMock()
-        mock_response.text = "【概要】テスト要約\n【重要なポイント】\n・ポイント1\n【アクションアイテム/結論】\nテスト結論"
-        mock_client.models.generate_content.return_value = mock_response
+        mock_response.text = json.dumps({"category": "NEWS", "keywords": [], "summary": "要約"})
+        mock_get_client.return_value.models.generate_content.return_value = mock_response
 
-        from gemini_service import summarize_transcript
+        import gemini_service
 
-        result = summarize_transcript("テスト字幕テキスト")
-        self.assertIn("【概要】", result)
-        self.assertIn("【重要なポイント】", result)
-        mock_client.models.generate_content.assert_called_once()
+        url = "https://www.youtube.com/watch?v=aaaaaaaaaaa"
+        gemini_service.analyze_video(url)
+        gemini_service.analyze_video(url)
+        self.assertEqual(mock_get_client.return_value.models.generate_content.call_count, 1)
+
+        # モデルを変えたら以前の分析結果は使わない
+        with patch("gemini_service.GEMINI_MODEL", "other-model"):
+            gemini_service.analyze_video(url)
+        self.assertEqual(mock_get_client.return_value.models.generate_content.call_count, 2)
 
 
 class TestLineService(unittest.TestCase):
     """LINE通知サービスのテスト"""
 
-    @patch("line_service.requests.post")
+    @patch("line_service._session.post")
     @patch("line_service.Config")
-    def test_send_notification_success(self, mock_config, mock_post):
+    def test_send_digest_success(self, mock_config, mock_post):
         mock_config.LINE_CHANNEL_ACCESS_TOKEN = "test_token"
         mock_config.LINE_USER_ID = "test_user_id"
         mock_response = MagicMock()
         mock_response.status_code = 200
         mock_post.return_value = mock_response
 
-        from line_service import send_notification
+        from line_service import send_digest
 
-        result = send_notification(
-            title="テスト動画",
-            summary="テスト要約",
-            video_url="https://www.youtube.com/watch?v=test",
-            thumbnail_url="https://img.youtube.com/test.jpg",
-        )
+        result = send_digest("テストダイジェスト", image_url="https://example.com/image.png")
         self.assertTrue(result)
         mock_post.assert_called_once()
 
-    @patch("line_service.requests.post")
+        headers = mock_post.call_args.kwargs["headers"]
+        self.assertEqual(headers["Authorization"], "Bearer test_token")
+        self.assertTrue(headers["X-Line-Retry-Key"])
+
+        payload = mock_post.call_args.kwargs["json"]
+        self.assertEqual(payload["to"], "test_user_id")
+        self.assertEqual([m["type"] for m in payload["messages"]], ["image", "text"])
+
+    @patch("line_service._session.post")
     @patch("line_service.Config")
-    def test_send_notification_failure(self, mock_config, mock_post):
+    def test_send_digest_uses_new_retry_key_per_call(self, mock_config, mock_post):
+        mock_config.LINE_CHANNEL_ACCESS_TOKEN = "test_token"
+        mock_config.LINE_USER_ID = "test_user_id"
+        mock_post.return_value.status_code = 200
+
+        from line_service import send_digest
+
+        send_digest("1回目")
+        send_digest("2回目")
+        keys = [c.kwargs["headers"]["X-Line-Retry-Key"] for c in mock_post.call_args_list]
+        self.assertNotEqual(keys[0], keys[1])
+
+    @patch("line_service._session.post")
+    @patch("line_service.Config")
+    def test_send_digest_duplicate_retry_is_success(self, mock_config, mock_post):
+        mock_config.LINE_CHANNEL_ACCESS_TOKEN = "test_token"
+        mock_config.LINE_USER_ID = "test_user_id"
+        mock_post.return_value.status_code = 409
+
+        from line_service import send_digest
+
+        self.assertTrue(send_digest("テストダイジェスト"))
+
+    @patch("line_service._session.post")
+    @patch("line_service.Config")
+    def test_send_digest_failure(self, mock_config, mock_post):
         mock_config.LINE_CHANNEL_ACCESS_TOKEN = "test_token"
         mock_config.LINE_USER_ID = "test_user_id"
         mock_response = MagicMock()
@@ -123,13 +311,9 @@ class TestLineService(unittest.TestCase):
         mock_response.text = "Unauthorized"
         mock_post.return_value = mock_response
 
-        from line_service import send_notification
+        from line_service import send_digest
 
-        result = send_notification(
-            title="テスト動画",
-            summary="テスト要約",
-            video_url="https://www.youtube.com/watch?v=test",
-        )
+        result = send_digest("テストダイジェスト")
         self.assertFalse(result)
 
 
@@ -148,6 +332,49 @@ class TestNotionService(unittest.TestCase):
         result = _split_rich_text(long_text, max_length=2000)
         self.assertEqual(len(result), 3)
 
+    @patch("notion_service._client")
+    def test_create_page_sets_summary_on_create(self, mock_client):
+        mock_client.return_value.pages.create.return_value = {"id": "page-id"}
+
+        from notion_service import create_page
+
+        create_page(
+            title="テスト動画",
+            url="https://www.youtube.com/watch?v=dQw4w9WgXcQ",
+            summary="テスト要約",
+            published_date="2025-01-15T00:00:00Z",
+        )
+        mock_client.return_value.pages.create.assert_called_once()
+        properties = mock_client.return_value.pages.create.call_args.kwargs["properties"]
+        self.assertIn("要約", properties)
+        mock_client.return_value.pages.update.assert_not_called()
+
+    @patch("notion_service._client")
+    def test_create_page_retries_without_missing_summary_property(self, mock_client):
+        from notion_client import APIErrorCode, APIResponseError
+
+        error = APIResponseError(
+            code=APIErrorCode.ValidationError,
+            status=400,
+            message="要約 is not a property that exists.",
+            headers={},
+            raw_body_text="",
+        )
+        mock_client.return_value.pages.create.side_effect = [error, {"id": "page-id"}]
+
+        from notion_service import create_page
+
+        page = create_page(
+            title="テスト動画",
+            url="https://www.youtube.com/watch?v=dQw4w9WgXcQ",
+            summary="テスト要約",
+            published_date="",
+        )
+        self.assertEqual(page["id"], "page-id")
+        self.assertEqual(mock_client.return_value.pages.create.call_count, 2)
+        properties = mock_client.return_value.pages.create.call_args.kwargs["properties"]
+        self.assertNotIn("要約", properties)
+
     def test_build_summary_blocks(self):
         from notion_service import _build_summary_blocks
 
@@ -163,5 +390,165 @@ class TestNotionService(unittest.TestCase):
         self.assertEqual(len(bullet_blocks), 2)
 
 
+class TestTokenBucket(unittest.TestCase):
+    """トークンバケットのテスト"""
+
+    @patch("rate_limiter.time")
+    def test_waits_only_when_bucket_is_empty(self, mock_time):
+        mock_time.monotonic.return_value = 100.0
+
+        from rate_limiter import TokenBucket
+
+        bucket = TokenBucket(rate=2, per=1.0)
+        bucket.take()
+        bucket.take()
+        mock_time.sleep.assert_not_called()
+
+        # 3回目は1トークン分（0.5秒）補充されるまで待つ
+        bucket.take()
+        mock_time.sleep.assert_called_once_with(0.5)
+
+
+class TestCacheService(TempCacheDirMixin, unittest.TestCase):
+    """ローカルキャッシュのテスト"""
+
+    def test_put_and_get(self):
+        import cache_service
+
+        key = cache_service.make_key("prompt", "https://www.youtube.com/watch?v=dQw4w9WgXcQ")
+        self.assertIsNone(cache_service.get("analysis", key))
+
+        cache_service.put("analysis", key, {"summary": "要約", "keywords": ["A"]})
+        self.assertEqual(cache_service.get("analysis", key), {"summary": "要約", "keywords": ["A"]})
+        self.assertIsNone(cache_service.get("other", key))
+
+    @patch("cache_service.time")
+    def test_expired_entry(self, mock_time):
+        import cache_service
+
+        mock_time.time.return_value = 1000.0
+        cache_service.put("video_info", "key", {"title": "タイトル"}, ttl=60)
+        self.assertEqual(cache_service.get("video_info", "key"), {"title": "タイトル"})
+
+        mock_time.time.return_value = 1061.0
+        self.assertIsNone(cache_service.get("video_info", "key"))
+
+    def test_corrupted_value_is_miss(self):
+        import cache_service
+
+        with cache_service._connect() as conn:
+            conn.execute(
+                "INSERT INTO cache (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                ("analysis", "key", '{"summary": "途中', None),
+            )
+        self.assertIsNone(cache_service.get("analysis", "key"))
+
+    def test_clear_namespace(self):
+        import cache_service
+
+        cache_service.put("analysis", "key", {"summary": "要約"})
+        cache_service.put("video_info", "key", {"title": "タイトル"})
+        cache_service.clear("video_info")
+        self.assertIsNone(cache_service.get("video_info", "key"))
+        self.assertEqual(cache_service.get("analysis", "key"), {"summary": "要約"})
+
+    @patch("config.Config.CACHE_ENABLED", False)
+    def test_disabled(self):
+        import cache_service
+
+        cache_service.put("analysis", "key", {"summary": "要約"})
+        self.assertIsNone(cache_service.get("analysis", "key"))
+
+
+class TestProcessChannel(unittest.TestCase):
+    """チャンネル処理パイプラインのテスト"""
+
+    @patch("sys.stdout", new_callable=io.StringIO)
+    def test_failed_batch_falls_back_and_keeps_order(self, _stdout):
+        import main
+
+        videos = [
+            {
+                "video_id": f"vid{i:08d}",
+                "title": f"動画{i}",
+                "published_at": "2025-01-15T00:00:00Z",
+                "thumbnail_url": "",
+                "channel_title": "チャンネル",
+            }
+            for i in range(4)
+        ]
+
+        def analyze_videos(urls):
+            # 最初のバッチ（3件）は失敗させる
+            if len(urls) == main.MAX_VIDEOS_PER_REQUEST:
+                raise ValueError("一括分析に失敗")
+            return [{"category": "NEWS", "keywords": [], "summary": f"一括 {url[-2:]}"} for url in urls]
+
+        def analyze_video(url):
+            category = "HOWTO" if url.endswith("01") else "NEWS"
+            return {"category": category, "keywords": [], "summary": f"個別 {url[-2:]}"}
+
+        def create_page(**kwargs):
+            # 先の動画ほど保存に時間がかかる（完了順と入力順を逆にする）
+            time.sleep(0.05 * (4 - int(kwargs["url"][-2:])))
+
+        mock_analyze_video = MagicMock(side_effect=analyze_video)
+        with patch.object(main, "get_latest_videos", return_value=videos), \
+                patch.object(main, "check_video_exists", return_value=False), \
+                patch.object(main, "analyze_videos", side_effect=analyze_videos), \
+                patch.object(main, "analyze_video", mock_analyze_video), \
+                patch.object(main, "create_page", side_effect=create_page):
+            news = asyncio.run(main.process_channel("UCtest", count=4))
+
+        # 失敗したバッチの動画だけが動画ごとに分析される
+        self.assertEqual(
+            sorted(c.args[0][-2:] for c in mock_analyze_video.call_args_list),
+            ["00", "01", "02"],
+        )
+        # NEWS系の要約は入力順に並ぶ（HOWTOの動画1は含まれない）
+        self.assertEqual(
+            [n["summary"] for n in news],
+            ["個別 00", "個別 02", "一括 03"],
+        )
+
+
+    @patch("sys.stdout", new_callable=io.StringIO)
+    def test_channel_output_is_not_interleaved(self, stdout):
+        import main
+
+        def get_latest_videos(channel_id, max_results):
+            return [
+                {
+                    "video_id": f"{channel_id}{i:08d}",
+                    "title": f"{channel_id}-{i}",
+                    "published_at": "2025-01-15T00:00:00Z",
+                    "thumbnail_url": "",
+                    "channel_title": channel_id,
+                }
+                for i in range(2)
+            ]
+
+        def analyze_videos(urls):
+            return [{"category": "NEWS", "keywords": [], "summary": url[-11:]} for url in urls]
+
+        def create_page(**kwargs):
+            # 後のチャンネルほど早く終わるようにする
+            time.sleep(0.05 if kwargs["channel_title"] == "UCA" else 0.01)
+            print(f"📝 [Notion] {kwargs['title']}")
+
+        with patch.object(main, "get_latest_videos", side_effect=get_latest_videos), \
+                patch.object(main, "check_video_exists", return_value=False), \
+                patch.object(main, "analyze_videos", side_effect=analyze_videos), \
+                patch.object(main, "create_page", side_effect=create_page):
+            news = asyncio.run(main.process_channels(["UCA", "UCB"], count=2))
+
+        self.assertEqual([n["title"] for n in news], ["UCA-0", "UCA-1", "UCB-0", "UCB-1"])
+
+        # チャンネルごとの出力（見出し・動画・サービス内の print・結果行）がまとまって並ぶ
+        lines = [line for line in stdout.getvalue().splitlines() if "UCA" in line or "UCB" in line]
+        channels = ["UCA" if "UCA" in line else "UCB" for line in lines]
+        self.assertEqual(len([i for i in range(1, len(channels)) if channels[i] != channels[i - 1]]), 1)
+
+
 if __name__ == "__main__":
     unittest.main()
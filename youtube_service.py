@@ -1,21 +1,73 @@
 """YouTube動画情報取得サービス"""
 
+import functools
 import re
-from urllib.parse import urlparse, parse_qs
+import threading
 
 from googleapiclient.discovery import build
 
+import cache_service
 from config import Config
+from rate_limiter import YOUTUBE_LIMITER
+
+
+# 動画ID（11文字の英数字+ハイフン+アンダースコア）
+_VIDEO_ID_RE = re.compile(r"[A-Za-z0-9_-]{11}")
+
+# 対応するURL形式から動画IDを1回のマッチで取り出す
+_VIDEO_URL_RE = re.compile(
+    r"^(?:https?://)?"
+    r"(?:(?:www\.|m\.)?youtube\.com/(?:watch\?(?:[^#]*&)?v=|(?:embed|shorts|live|e|v)/)|youtu\.be/)"
+    r"([A-Za-z0-9_-]{11})(?![A-Za-z0-9_-])"
+)
+
+# 動画メタデータのキャッシュ（タイトル変更等に追従できるよう24時間で失効）
+VIDEO_INFO_CACHE_NAMESPACE = "video_info"
+VIDEO_INFO_CACHE_TTL = 24 * 60 * 60
+
+# サムネイルの優先順位（高画質から順に採用）
+_THUMB_PRIORITY = ("maxres", "high", "medium", "default")
+
+# 部分レスポンス（fields）で使用する項目だけを取得し、転送量とJSON解析を減らす
+_VIDEOS_FIELDS = (
+    "items(id,snippet(title,publishedAt,channelTitle,thumbnails("
+    + ",".join(f"{q}/url" for q in _THUMB_PRIORITY)
+    + ")))"
+)
+_SEARCH_FIELDS = "items(id/videoId)"
+
+# build() はディスカバリー文書の解析を伴うため、生成したクライアントを使い回す。
+# 内部の httplib2.Http はスレッドセーフではないので、スレッドごとに1つ保持する。
+_local = threading.local()
+
+
+def _youtube_client():
+    """このスレッド用のYouTube Data APIクライアントを返す（初回のみ生成）。"""
+    client = getattr(_local, "youtube", None)
+    if client is None:
+        client = build(
+            "youtube",
+            "v3",
+            developerKey=Config.YOUTUBE_API_KEY,
+            cache_discovery=False,
+            static_discovery=True,
+        )
+        _local.youtube = client
+    return client
 
 
+@functools.lru_cache(maxsize=1024)
 def extract_video_id(url: str) -> str:
     """YouTube URLから動画IDを抽出する。
 
     対応形式:
-        - https://www.youtube.com/watch?v=VIDEO_ID
+        - https://www.youtube.com/watch?v=VIDEO_ID（m.youtube.com / youtube.com も可）
         - https://youtu.be/VIDEO_ID
         - https://www.youtube.com/embed/VIDEO_ID
         - https://www.youtube.com/shorts/VIDEO_ID
+        - https://www.youtube.com/v/VIDEO_ID
+        - https://www.youtube.com/e/VIDEO_ID
+        - https://www.youtube.com/live/VIDEO_ID
 
     Args:
         url: YouTube動画のURL。
@@ -26,29 +78,13 @@ def extract_video_id(url: str) -> str:
     Raises:
         ValueError: URLから動画IDを抽出できない場合。
     """
-    # 直接IDが渡された場合（11文字の英数字+ハイフン+アンダースコア）
-    if re.match(r"^[A-Za-z0-9_-]{11}$", url):
+    # 直接IDが渡された場合
+    if _VIDEO_ID_RE.fullmatch(url):
         return url
 
-    parsed = urlparse(url)
-
-    # youtu.be/VIDEO_ID
-    if parsed.hostname in ("youtu.be",):
-        video_id = parsed.path.lstrip("/")
-        if video_id:
-            return video_id.split("/")[0]
-
-    # youtube.com/watch?v=VIDEO_ID
-    if parsed.hostname in ("www.youtube.com", "youtube.com", "m.youtube.com"):
-        if parsed.path == "/watch":
-            qs = parse_qs(parsed.query)
-            if "v" in qs:
-                return qs["v"][0]
-
-        # /embed/VIDEO_ID or /shorts/VIDEO_ID
-        match = re.match(r"^/(embed|shorts|v)/([A-Za-z0-9_-]+)", parsed.path)
-        if match:
-            return match.group(2)
+    match = _VIDEO_URL_RE.match(url)
+    if match:
+        return match.group(1)
 
     raise ValueError(f"YouTube動画IDを抽出できません: {url}")
 
@@ -66,26 +102,71 @@ def get_video_info(video_id: str) -> dict:
             - thumbnail_url: サムネイルURL
             - channel_title: チャンネル名
     """
-    youtube = build("youtube", "v3", developerKey=Config.YOUTUBE_API_KEY)
+    info = get_videos_info([video_id]).get(video_id)
+    if info is None:
+        raise ValueError(f"動画が見つかりません: {video_id}")
+    return info
 
-    response = (
-        youtube.videos()
-        .list(part="snippet", id=video_id)
-        .execute()
-    )
 
-    if not response.get("items"):
-        raise ValueError(f"動画が見つかりません: {video_id}")
+def get_videos_info(video_ids: list[str]) -> dict[str, dict]:
+    """複数動画のメタデータをまとめて取得する。
+
+    videos.list は1リクエストで最大50件のIDを受け付けるため、
+    動画ごとにリクエストする場合に比べて往復回数とクォータ消費を抑えられる。
+    取得済み（キャッシュ済み）の動画はリクエストに含めない。
+
+    Args:
+        video_ids: YouTube動画IDのリスト。
+
+    Returns:
+        動画ID → 動画情報（get_video_info と同じ形式）の辞書。
+        見つからなかった動画は含まれない。
+    """
+    infos = {}
+    pending = []
+    for video_id in video_ids:
+        cached = cache_service.get(VIDEO_INFO_CACHE_NAMESPACE, video_id)
+        if cached is not None:
+            infos[video_id] = cached
+        else:
+            pending.append(video_id)
+
+    if not pending:
+        return infos
+
+    youtube = _youtube_client()
+
+    for i in range(0, len(pending), 50):
+        YOUTUBE_LIMITER.take()
+        response = (
+            youtube.videos()
+            .list(
+                part="snippet",
+                id=",".join(pending[i:i + 50]),
+                maxResults=50,
+                fields=_VIDEOS_FIELDS,
+            )
+            .execute()
+        )
 
-    snippet = response["items"][0]["snippet"]
+        for item in response.get("items", []):
+            info = _snippet_to_info(item["snippet"])
+            infos[item["id"]] = info
+            cache_service.put(VIDEO_INFO_CACHE_NAMESPACE, item["id"], info, ttl=VIDEO_INFO_CACHE_TTL)
 
+    return infos
+
+
+def clear_cache() -> None:
+    """キャッシュした動画メタデータを削除する。"""
+    cache_service.clear(VIDEO_INFO_CACHE_NAMESPACE)
+
+
+def _snippet_to_info(snippet: dict) -> dict:
+    """videos.list の snippet を動画情報の辞書に変換する。"""
     # サムネイル: maxres > high > medium > default の順に取得
     thumbnails = snippet.get("thumbnails", {})
-    thumbnail_url = ""
-    for quality in ("maxres", "high", "medium", "default"):
-        if quality in thumbnails:
-            thumbnail_url = thumbnails[quality]["url"]
-            break
+    thumbnail_url = next((thumbnails[q]["url"] for q in _THUMB_PRIORITY if q in thumbnails), "")
 
     return {
         "title": snippet["title"],
@@ -105,9 +186,10 @@ def get_latest_videos(channel_id: str, max_results: int = 5) -> list[dict]:
     Returns:
         動画情報のリスト。各要素は get_video_info と同じ形式 + video_id。
     """
-    youtube = build("youtube", "v3", developerKey=Config.YOUTUBE_API_KEY)
+    youtube = _youtube_client()
 
     # チャンネルの最新動画を検索
+    YOUTUBE_LIMITER.take()
     search_response = (
         youtube.search()
         .list(
@@ -116,18 +198,19 @@ def get_latest_videos(channel_id: str, max_results: int = 5) -> list[dict]:
             order="date",
             type="video",
             maxResults=min(max_results, 50),
+            fields=_SEARCH_FIELDS,
         )
         .execute()
     )
 
+    video_ids = [item["id"]["videoId"] for item in search_response.get("items", [])]
+    infos = get_videos_info(video_ids)
+
     videos = []
-    for item in search_response.get("items", []):
-        video_id = item["id"]["videoId"]
-        try:
-            info = get_video_info(video_id)
-            info["video_id"] = video_id
-            videos.append(info)
-        except Exception as e:
-            print(f"⚠️ 動画情報の取得に失敗 ({video_id}): {e}")
+    for video_id in video_ids:
+        if video_id not in infos:
+            print(f"⚠️ 動画情報の取得に失敗 ({video_id}): 動画が見つかりません")
+            continue
+        videos.append({**infos[video_id], "video_id": video_id})
 
     return videos[:max_results]